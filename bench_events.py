@@ -0,0 +1,83 @@
+"""
+token event 하나당 할당/dispatch 비용 측정
+
+    python bench_events.py [N]
+
+dict + 문자열 비교 체인(예전 방식)과 __slots__ event + int kind match dispatch(case Kind.TOKEN)를 비교한다.
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from core.domain import Kind, TokenEvent  # noqa: E402
+
+
+def make_dicts(n: int) -> list:
+    return [{'type': 'token', 'text': 'tok'} for _ in range(n)]
+
+
+def make_events(n: int) -> list:
+    return [TokenEvent('tok') for _ in range(n)]
+
+
+def dispatch_dicts(events: list) -> int:
+    total = 0
+    for ev in events:
+        etype = ev.get('type', '')
+        if etype == 'token':
+            total += len(ev.get('text', ''))
+        elif etype == 'tool_start':
+            total -= 1
+        elif etype == 'tool_end':
+            total -= 1
+        elif etype == 'interrupt':
+            total -= 1
+        elif etype == 'done':
+            break
+    return total
+
+
+def dispatch_events(events: list) -> int:
+    total = 0
+    for ev in events:
+        match ev.kind:
+            case Kind.TOKEN:
+                total += len(ev.text)
+            case Kind.TOOL_START | Kind.TOOL_END | Kind.INTERRUPT:
+                total -= 1
+            case Kind.DONE:
+                break
+    return total
+
+
+def peak_bytes(factory, n: int) -> int:
+    tracemalloc.start()
+    objs = factory(n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return peak
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, make, dispatch in (
+        ('dict', make_dicts, dispatch_dicts),
+        ('slots', make_events, dispatch_events),
+    ):
+        alloc_s = min(timeit.repeat(lambda: make(n), number=1, repeat=5))
+        events = make(n)
+        dispatch_s = min(timeit.repeat(lambda: dispatch(events), number=1, repeat=5))
+        print(
+            f'{name:>6}: alloc {alloc_s / n * 1e9:7.1f} ns/event  '
+            f'dispatch {dispatch_s / n * 1e9:7.1f} ns/event  '
+            f'mem {peak_bytes(make, n) / n:6.1f} B/event'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,23 @@
 Claude CLI Mimic
 """
 
+import argparse
 import os
 from typing import Dict, Optional
 from textual import work
 from textual.app import App, ComposeResult
+from rich.console import Group
+from rich.text import Text
 import asyncio
 
+from core.agents.tool_executor import shutdown_executor
+from core.diagnostics import MemoryReporter, checkpoint_probe, deep_sizeof, queue_probe
+from core.domain import DoneEvent, ErrorEvent, Kind
+from core.http_client import aclose_shared_client, pool_stats
 from core.orchestrator import Orchestrator
+from core.replay import ReplayAgent, StreamRecorder
 from models import Turn
-from widgets import InputArea, ChatLog
+from widgets import InputArea, ChatLog, StreamingMessage
 from screens import WorkspaceConfirmScreen
 
 from dotenv import load_dotenv
@@ -20,12 +28,24 @@ load_dotenv()
 
 
 class ChatApp(App):
-    def __init__(self):
-        """Initialize the chat application with default state."""
+    def __init__(self, mem_report: Optional[str] = None, mem_interval: float = 60.0,
+                 record: Optional[str] = None, replay: Optional[str] = None, replay_speed: float = 1.0):
+        """
+        Initialize the chat application with default state.
+        
+        Args:
+            mem_report: If set, trace memory from startup and append a JSON summary to this path periodically
+            mem_interval: Seconds between JSON summaries
+            record: Record the raw agent event stream to this path
+            replay: Play back a recorded stream instead of calling the LLM
+            replay_speed: Playback speed multiplier for replay (0 = as fast as possible)
+        """
         super().__init__()
         self.event_q = asyncio.Queue()
         self.cmd_q = asyncio.Queue()
-        self.orchestrator = Orchestrator(self.event_q, self.cmd_q)
+        self.recorder = StreamRecorder(record) if record else None
+        agent = ReplayAgent(replay, replay_speed) if replay else None
+        self.orchestrator = Orchestrator(self.event_q, self.cmd_q, agent=agent, recorder=self.recorder)
         
         self.workspace_root = None
         
@@ -36,13 +56,30 @@ class ChatApp(App):
         self.active_turn_id: Optional[int] = None
         self._current_answer_buffer: str = ""
         
+        # type-ahead: submitted while a turn is running, processed in order by _infer_loop
+        self.prompt_q: asyncio.Queue[int] = asyncio.Queue()
+        
         self._pump_worker = None
         
+        self.mem_report_path = mem_report
+        self.mem_interval = mem_interval
+        self.mem = MemoryReporter({
+            'checkpoints': checkpoint_probe(self.orchestrator.agent.checkpointer),
+            'turns': self._turns_probe,
+            'chat_log': self._chat_log_probe,
+            'event_queue': queue_probe(self.event_q),
+            'resume': self.orchestrator.resume_stats,
+            'llm_http': pool_stats,
+        })
+        if mem_report:
+            self.mem.start()
+        
     def compose(self) -> ComposeResult:
         """
         Create the main UI layout.
         """
         yield ChatLog(id="chat_log", markup=True)
+        yield StreamingMessage(id="streaming")
         yield InputArea(id="input_text", placeholder="how can i help you")
         yield SelectOption(id="input_selection")
         
@@ -52,9 +89,22 @@ class ChatApp(App):
         txt = self.query_one('#input_text', InputArea)
         sel.visible = False
         txt.visible = True
+        # kept for the memory probe, which runs off the UI thread
+        self._chat_log = self.query_one("#chat_log", ChatLog)
+        
+        if self.mem_report_path:
+            self.set_interval(self.mem_interval, self._dump_mem_report)
         
         self._startup_flow()
         
+    async def on_unmount(self) -> None:
+        """Release pooled LLM connections and tool workers on exit."""
+        if self.mem_report_path:
+            self.mem.dump_json(self.mem_report_path)
+        shutdown_executor()
+        if self.recorder:
+            self.recorder.close()
+        await aclose_shared_client()
         
     @work(exclusive=True, group="startup")
     async def _startup_flow(self) -> None:
@@ -65,17 +115,17 @@ class ChatApp(App):
         1. Shows workspace confirmation dialog
         2. Sets up the workspace if confirmed
         3. Displays welcome message
-        4. Starts the event processing pump
+        4. Starts the event processing pump and the prompt queue worker
         """
         
         result = await self.push_screen_wait(WorkspaceConfirmScreen(os.getcwd()))
         self.workspace_root = os.getcwd() if result else None
         chat_log = self.query_one("#chat_log", ChatLog)
-        chat_log.write("[bold green]Welcome to Claude CLI Mimic![/bold green]")
+        chat_log.append("[bold green]Welcome to Claude CLI Mimic![/bold green]")
         if self.workspace_root:
-            chat_log.write(f"[dim]cwd: {self.workspace_root}[/dim]")
+            chat_log.append(f"[dim]cwd: {self.workspace_root}[/dim]")
         else:
-            chat_log.write("[dim]No workspace selected. You can still chat.[/dim]")
+            chat_log.append("[dim]No workspace selected. You can still chat.[/dim]")
         
         def apply_mode():
             self._change_input_mode(is_selection=False)
@@ -84,29 +134,38 @@ class ChatApp(App):
         self.call_after_refresh(apply_mode)
         
         self._pump()
+        self._infer_loop()
 
         
     async def on_input_area_submit(self, message: InputArea.Submit) -> None:
         """
         1. Creates a new conversation turn
         2. Displays the user message
-        3. Initiates AI response generation
+        3. Queues the turn; it runs as soon as earlier turns finish
         """
         text = message.value.strip()
+        if not text:
+            return
+        if text == '/mem':
+            self._show_mem_report()
+            return
         
         turn_id = self.next_turn_id
         self.next_turn_id += 1
         
-        turn = Turn(turn_id=turn_id, user_text=text, status="thinking")
+        ahead = self.prompt_q.qsize() + (1 if self.active_turn_id is not None else 0)
+        
+        turn = Turn(turn_id=turn_id, user_text=text, status="queued", queued=bool(ahead))
         self.turns[turn_id] = turn
         self.turn_order.append(turn_id)
-        self.active_turn_id = turn_id
         
         chat_log = self.query_one("#chat_log", ChatLog)
-        chat_log.write(f"[dim] user: {text} [/dim]")
+        chat_log.append(f"[dim] user: {text} [/dim]")
+        if ahead:
+            chat_log.append(f"[dim]   queued #{turn_id} ({ahead} ahead)[/dim]")
         
-        self._start_thinking()
-        self.run_infer(text)
+        self.prompt_q.put_nowait(turn_id)
+        self._update_queue_status()
         
     async def on_selection_made(self, message: SelectionMade) -> None:
         """
@@ -119,6 +178,44 @@ class ChatApp(App):
         self._change_input_mode(is_selection=False)
         
 
+    # Snapshots and structure probes are slow on a long session, so they run in
+    # a thread to keep the UI loop rendering.
+    @work(group='mem')
+    async def _show_mem_report(self):
+        """Write the memory diagnostics report into the chat log."""
+        chat_log = self.query_one("#chat_log", ChatLog)
+        was_tracing = self.mem.tracing()
+        lines = await asyncio.to_thread(self.mem.format_report)
+        for line in lines:
+            chat_log.append(Text(line, style='dim'))
+        if not was_tracing:
+            self.mem.start()
+    
+    @work(group='mem')
+    async def _dump_mem_report(self):
+        await asyncio.to_thread(self.mem.dump_json, self.mem_report_path)
+    
+    @work(group='mem')
+    async def _mark_mem_turn(self, turn_id: int):
+        await asyncio.to_thread(self.mem.mark_turn, turn_id)
+    
+    def _turns_probe(self) -> dict:
+        return {
+            'count': len(self.turns),
+            'text_bytes': sum(len(t.user_text) + len(t.assistant_buffer) for t in self.turns.values()),
+            'approx_bytes': deep_sizeof(self.turns),
+        }
+    
+    def _chat_log_probe(self) -> dict:
+        chat_log = self._chat_log
+        return {'lines': len(chat_log.lines), 'entries': len(chat_log._entries), 'dropped': chat_log.dropped_entries}
+
+    def _update_queue_status(self):
+        """Show how many submissions are waiting in the input placeholder."""
+        input_text = self.query_one('#input_text', InputArea)
+        queued = self.prompt_q.qsize()
+        input_text.placeholder = f"{queued} queued, keep typing" if queued else "how can i help you"
+
     def _start_thinking(self):
         """Start the thinking indicator (placeholder for future implementation)."""
         pass
@@ -140,69 +237,119 @@ class ChatApp(App):
 
 
     @work(exclusive=True, group='infer')
-    async def run_infer(self, user_input: str):
+    async def _infer_loop(self):
         """
-        Run agent inference on user input.
+        Run queued turns one at a time.
+        
+        Every event the orchestrator emits carries the turn id, so the pump
+        attributes output to the right turn even if new prompts arrive meanwhile.
+        Nothing is drawn here: the previous turn's events may still be queued.
         """
-        await self.orchestrator.run(user_input)
+        while True:
+            turn_id = await self.prompt_q.get()
+            turn = self.turns[turn_id]
+            
+            turn.status = "thinking"
+            self.active_turn_id = turn_id
+            self._update_queue_status()
+            
+            self._start_thinking()
+            try:
+                await self.orchestrator.run(turn.user_text, turn_id)
+            except Exception as e:
+                await self.event_q.put(ErrorEvent(str(e), turn_id))
+                await self.event_q.put(DoneEvent(turn_id))
+            finally:
+                self.active_turn_id = None
     
     @work(exclusive=True, group='pump')
     async def _pump(self):
         """
         Event processing loop.
    
-        Event types handled:
-        - 'token': Streaming response tokens from the AI
-        - 'done': Response completion indicator
+        Events are dispatched on their integer kind (see core.domain.Kind):
+        - TokenEvent: Streaming response tokens from the AI
+        - ToolStartEvent / ToolEndEvent: Tool call progress
+        - InterruptEvent: Approval request
+        - DoneEvent: Response completion indicator
         """
         chat_log = self.query_one("#chat_log", ChatLog)
+        streaming = self.query_one("#streaming", StreamingMessage)
+        drawn_turn_id: Optional[int] = None
         
         while True:
             ev = await self.event_q.get()
-            type = ev.get("type", '')
             
-            cur_turn: Optional[Turn] = (
-                self.turns.get(self.active_turn_id) if self.active_turn_id else None
-            )
+            turn_id = ev.turn_id if ev.turn_id is not None else self.active_turn_id
+            cur_turn: Optional[Turn] = self.turns.get(turn_id) if turn_id else None
             
-            if type == "token":
-                text = ev.get('text', '')
-                if not text:
-                    continue
-                
-                if cur_turn:
-                    if cur_turn.status == "thinking":
-                        cur_turn.status = "streaming"
-                        self._stop_thinking()
-                    cur_turn.assistant_buffer += text
-            elif type == 'tool_start':
-                """ draw tool calling state """
-                tool_name = ev.get('tool')
-                args = ev.get('args')
-                log = f'toolname: {tool_name}, args: {args}'
-                chat_log.write(f'tool calling start: {log}')
-                
-            elif type == 'tool_end':
-                """ draw tool calling end, and draw result of tool calling """
-                tool_name = ev.get('tool')
-                output = ev.get('output_preview')
-                log = f'toolname: {tool_name}, output: {output}'
-                chat_log.write(f'tool calling end: {log}')
-            elif type == 'interrupt':
-                """ get user input whether to approve """
-                self._change_input_mode(is_selection=True)
-                selection = self.query_one(SelectOption)
-                selection.set_selection_options(['1. yes', '2. no'], ['yes', 'no'])
-                
-            elif type == 'done':
-                if cur_turn:
-                    chat_log.write(f'assistant: {cur_turn.assistant_buffer}')
-                    cur_turn.assistant_buffer = ''
-                    cur_turn.status = 'final'
+            # first event of a new turn: the previous turn's output is fully drawn by now
+            if cur_turn and turn_id != drawn_turn_id:
+                drawn_turn_id = turn_id
+                if cur_turn.queued:
+                    chat_log.append(f"[dim]   running #{turn_id}: {cur_turn.user_text}[/dim]")
+            
+            match ev.kind:
+                case Kind.TOKEN:
+                    text = ev.text
+                    if not text:
+                        continue
+                    
+                    if cur_turn:
+                        if cur_turn.status == "thinking":
+                            cur_turn.status = "streaming"
+                            self._stop_thinking()
+                        cur_turn.assistant_buffer += text
+                    streaming.append(text)
+                    
+                case Kind.TOOL_START:
+                    """ draw tool calling state """
+                    log = f'toolname: {ev.tool}, args: {ev.args}'
+                    chat_log.append(f'tool calling start: {log}')
                     
+                case Kind.TOOL_END:
+                    """ draw tool calling end, and draw result of tool calling """
+                    log = f'toolname: {ev.tool}, output: {ev.output_preview}'
+                    chat_log.append(f'tool calling end: {log}')
+                    
+                case Kind.INTERRUPT:
+                    """ get user input whether to approve """
+                    self._change_input_mode(is_selection=True)
+                    selection = self.query_one(SelectOption)
+                    selection.set_selection_options(['1. yes', '2. no'], ['yes', 'no'])
+                    
+                case Kind.ERROR:
+                    chat_log.append(Text(f'error: {ev.message}', style='red'))
+                    
+                case Kind.DONE:
+                    rendered = streaming.finish()
+                    if cur_turn:
+                        chat_log.append(Group(Text(f'assistant #{cur_turn.turn_id}:', style='bold'), rendered))
+                        cur_turn.assistant_buffer = ''
+                        cur_turn.status = 'final'
+                        if self.mem.tracing():
+                            self._mark_mem_turn(cur_turn.turn_id)
+                    
+
 
 def main():
-    app = ChatApp()
+    parser = argparse.ArgumentParser(description='Claude CLI Mimic')
+    parser.add_argument('--mem-report', metavar='PATH',
+                        help='trace memory and append a JSON summary to PATH periodically')
+    parser.add_argument('--mem-interval', type=float, default=60.0, metavar='SECONDS')
+    parser.add_argument('--record', metavar='PATH', help='record the raw agent event stream to PATH')
+    parser.add_argument('--replay', metavar='PATH', help='replay a recorded stream instead of calling the LLM')
+    parser.add_argument('--replay-speed', type=float, default=1.0, metavar='X',
+                        help='playback speed multiplier, 0 for max speed')
+    args = parser.parse_args()
+    
+    app = ChatApp(
+        mem_report=args.mem_report,
+        mem_interval=args.mem_interval,
+        record=args.record,
+        replay=args.replay,
+        replay_speed=args.replay_speed,
+    )
     app.run()
 
 
@@ -1,3 +1,4 @@
+import hashlib
 from typing import Annotated, Optional, TypedDict
 from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END
@@ -6,11 +7,17 @@ from langgraph.types import interrupt
 from langchain.tools import tool
 from langgraph.graph.message import add_messages
 from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
 
+from core.agents.tool_executor import offload
+from core.http_client import llm_client_kwargs
+from core.rate_limiter import Priority, estimate_tokens, get_scheduler
+
 
 SYSTEM_PROMPT = """You are a file creation assistant. 
 When asked to create a file, you MUST use the write_file tool.
+When asked for a checksum of a file, use the hash_file tool.
 The system will ask for human approval before executing tools - just proceed with your plan.
 
 Example: If user asks to create hello.txt with "Hello World", call write_file(path="hello.txt", content="Hello World").
@@ -30,6 +37,33 @@ def file_write_tool(path:str, content: str) -> str:
     
     return f'[mock] write to {path} len={len(content)}'
 
+@offload('cpu', timeout=60)
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                h.update(chunk)
+                size += len(chunk)
+    except OSError as e:
+        return f'[error] {e}'
+    return f'sha256={h.hexdigest()} size={size}'
+
+@tool("hash_file")
+async def file_hash_tool(path: str) -> str:
+    """return the sha256 digest and size of the file at the given path"""
+    # 읽기도 write_file과 같은 승인 절차를 거친다. interrupt는 graph 안에서만 되므로 hashing만 pool로 보낸다.
+    approved = interrupt({
+        'type': 'approval_request',
+        'plan':[{'tool': 'hash_file',
+                 'args': {'path': path}}]
+    })
+    if not approved:
+        return '[cancelled] user denied'
+    
+    return await _sha256_file(path)
+
 class AgentState(TypedDict):
     messages: Annotated[list[BaseMessage], add_messages]
     approved: Optional[bool]
@@ -40,6 +74,7 @@ def build_llm(model, tools:list[any], temperature = 0):
         model=model,
         temperature=temperature,
         streaming=True,
+        **llm_client_kwargs(),
         # model_kwargs={'tool_choice': 'required'},
     ).bind_tools(tools)
 
@@ -49,14 +84,23 @@ def has_tool_calls(state):
     return bool(getattr(last, "tool_calls", None))
 
 def chatbot_factory(llm_with_tools):
-    async def chatbot(state: AgentState):
+    async def chatbot(state: AgentState, config: RunnableConfig):
         msgs = [SystemMessage(SYSTEM_PROMPT), *state["messages"]]
-        ai_msg = await llm_with_tools.ainvoke(msgs)
+        
+        configurable = config.get('configurable') or {}
+        session_id = str(configurable.get('thread_id', 'default'))
+        priority = Priority(configurable.get('priority', Priority.INTERACTIVE))
+        est = estimate_tokens([m.content for m in msgs if isinstance(m.content, str)])
+        
+        async with get_scheduler().slot(session_id, priority, est) as slot:
+            ai_msg = await llm_with_tools.ainvoke(msgs)
+            usage = getattr(ai_msg, 'usage_metadata', None) or {}
+            slot.used_tokens = usage.get('total_tokens')
         return {'messages': [ai_msg]}
     return chatbot
 
 
-def build_agent(model: str, tools: list[any] = [file_write_tool]):
+def build_agent(model: str, tools: list[any] = [file_write_tool, file_hash_tool]):
     """
     tool 따로 빼야됨
     """
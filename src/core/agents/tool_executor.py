@@ -0,0 +1,163 @@
+"""
+tool 실행 layer
+
+ToolNode는 token streaming, Textual UI와 같은 event loop에서 tool을 실행한다.
+무거운 tool이 loop를 막지 않도록 tool이 스스로 성격을 선언하게 하고, 그에 맞는 pool로 보낸다.
+- 'cpu': process pool (hashing, diff, 큰 파일 parsing 등)
+- 'io' : thread pool (blocking file/network IO)
+
+    @tool("hash_file")
+    @offload('cpu', timeout=60)
+    def hash_file(path: str) -> str:
+        ...
+
+offload로 감싼 함수는 module 최상단에 정의돼 있어야 한다. (process pool에서 import 해서 찾는다)
+"""
+
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Literal, Optional
+
+ToolKind = Literal['cpu', 'io']
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_RESULT_CHARS = 20_000
+
+_REGISTRY: dict[str, Callable[..., Any]] = {}
+
+
+def _key(fn: Callable[..., Any]) -> str:
+    return f'{fn.__module__}:{fn.__qualname__}'
+
+
+def _truncate(result: Any, max_chars: int) -> Any:
+    if isinstance(result, str) and len(result) > max_chars:
+        return result[:max_chars] + f'\n[truncated] {len(result) - max_chars} chars omitted'
+    return result
+
+
+def _run_registered(key: str, args: tuple, kwargs: dict, max_chars: int) -> Any:
+    """
+    worker process 안에서 실행된다. 함수 객체 대신 key를 넘겨서 module을 import 한 뒤 registry에서 찾는다.
+    결과를 여기서 잘라야 큰 결과가 pipe를 타고 넘어오지 않는다.
+    """
+    if key not in _REGISTRY:
+        importlib.import_module(key.split(':', 1)[0])
+    return _truncate(_REGISTRY[key](*args, **kwargs), max_chars)
+
+
+class ToolExecutor:
+    def __init__(self, cpu_workers: Optional[int] = None, io_workers: Optional[int] = None):
+        self.cpu_workers = cpu_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.io_workers = io_workers or 8
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        if self._process_pool is None:
+            # fork는 event loop/thread 상태까지 복사하므로 spawn으로 띄운다.
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._process_pool
+
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='tool-io')
+        return self._thread_pool
+
+    def _recycle_process_pool(self, pool: Optional[ProcessPoolExecutor] = None) -> None:
+        """
+        이미 실행 중인 process 작업은 cancel 할 수 없으므로 worker를 종료시키고 pool을 새로 만든다.
+        같은 pool에서 돌던 다른 작업은 BrokenExecutor로 끝난다.
+        pool을 넘기면 그 pool이 아직 현재 pool일 때만 정리한다. (이미 새로 만든 pool을 죽이지 않도록)
+        """
+        if pool is not None and pool is not self._process_pool:
+            return
+        pool, self._process_pool = self._process_pool, None
+        if pool is None:
+            return
+        for proc in list(getattr(pool, '_processes', {}).values()):
+            proc.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable[..., Any], kind: ToolKind, args: tuple, kwargs: dict,
+                  timeout: float = DEFAULT_TIMEOUT, max_result_chars: int = DEFAULT_MAX_RESULT_CHARS) -> Any:
+        loop = asyncio.get_running_loop()
+        name = getattr(fn, '__name__', 'tool')
+
+        pool: Optional[ProcessPoolExecutor] = None
+        if kind == 'cpu':
+            pool = self.process_pool
+            fut = loop.run_in_executor(
+                pool,
+                functools.partial(_run_registered, _key(fn), args, kwargs, max_result_chars),
+            )
+        else:
+            fut = loop.run_in_executor(self.thread_pool, functools.partial(fn, *args, **kwargs))
+
+        try:
+            result = await asyncio.wait_for(fut, timeout)
+        except TimeoutError:
+            if pool is not None:
+                self._recycle_process_pool(pool)
+            return f'[timeout] {name} did not finish in {timeout:g}s'
+        except asyncio.CancelledError:
+            # turn이 취소되면 실행 중인 worker도 놓아준다. timeout과 같은 방식.
+            if pool is not None:
+                self._recycle_process_pool(pool)
+            raise
+        except BrokenExecutor:
+            if pool is not None:
+                self._recycle_process_pool(pool)
+            return f'[error] {name} worker pool was restarted'
+
+        return result if kind == 'cpu' else _truncate(result, max_result_chars)
+
+    def shutdown(self) -> None:
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+            self._thread_pool = None
+        self._recycle_process_pool()
+
+
+_executor: Optional[ToolExecutor] = None
+
+
+def get_executor() -> ToolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ToolExecutor()
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def offload(kind: ToolKind = 'io', timeout: float = DEFAULT_TIMEOUT,
+            max_result_chars: int = DEFAULT_MAX_RESULT_CHARS):
+    """
+    동기 tool 함수를 pool에서 실행되는 async 함수로 바꾼다.
+    functools.wraps로 signature/docstring을 유지하므로 그 위에 @tool을 그대로 붙일 수 있다.
+    """
+    def decorator(fn: Callable[..., Any]):
+        _REGISTRY[_key(fn)] = fn
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await get_executor().run(fn, kind, args, kwargs, timeout, max_result_chars)
+
+        wrapper.tool_kind = kind
+        return wrapper
+    return decorator
@@ -0,0 +1,202 @@
+"""
+오래 켜둔 session의 메모리 사용량을 subsystem 단위로 나눠서 보여주는 진단 도구
+
+두 가지를 같이 본다.
+- tracemalloc snapshot: 할당된 위치(traceback)를 보고 subsystem에 귀속시킨다.
+- probe: 각 자료구조(checkpoint, turns, chat log, event queue)의 크기를 직접 센다.
+  turn(dataclass __init__은 '<string>'에서 실행된다)이나 queue에 쌓인 event(producer 쪽에서 만든다)처럼
+  할당 위치로는 구분이 안 되는 것은 probe의 approx_bytes로만 본다.
+turn이 끝날 때마다 mark_turn()을 부르면 turn 당 증가량을 계산한다.
+snapshot/probe는 무거우므로 UI event loop가 아니라 thread에서 부르는 것을 전제로 한다. (asyncio.to_thread)
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Optional
+
+
+# traceback의 frame 경로 중 하나라도 이 문자열을 포함하면 해당 subsystem으로 본다. 앞에 있는 것이 우선.
+SUBSYSTEM_PATTERNS: list[tuple[str, tuple[str, ...]]] = [
+    ('checkpoints', ('langgraph/checkpoint', 'langgraph\\checkpoint')),
+    ('chat_log', ('widgets/chat_log', 'widgets\\chat_log', '_rich_log')),
+    ('streaming', ('widgets/streaming_message', 'widgets\\streaming_message')),
+    ('llm_http', ('httpx', 'httpcore', 'openai', 'h11', 'h2')),
+    ('langchain', ('langchain', 'langgraph')),
+    ('ui', ('textual', 'rich')),
+]
+
+TRACE_FRAMES = 16
+
+Probe = Callable[[], dict[str, Any]]
+
+
+def _classify(traceback: tracemalloc.Traceback) -> str:
+    """
+    traceback 전체에서 SUBSYSTEM_PATTERNS의 우선순위대로 찾는다.
+    tracemalloc traceback은 바깥 frame(textual worker 등)부터 오므로 frame 순서로 고르면 안 된다.
+    """
+    filenames = [frame.filename for frame in traceback]
+    for name, patterns in SUBSYSTEM_PATTERNS:
+        if any(p in filename for filename in filenames for p in patterns):
+            return name
+    return 'other'
+
+
+def deep_sizeof(obj: Any, limit: int = 100_000) -> int:
+    """container를 따라가며 sys.getsizeof를 더한다. 순환/공유 객체는 한 번만 센다."""
+    seen: set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < limit:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        elif hasattr(o, '__dict__'):
+            stack.append(vars(o))
+        elif hasattr(o, '__slots__'):
+            stack.extend(getattr(o, s) for s in o.__slots__ if hasattr(o, s))
+    return total
+
+
+class MemoryReporter:
+    def __init__(self, probes: Optional[dict[str, Probe]] = None, history: int = 64):
+        self.probes: dict[str, Probe] = dict(probes or {})
+        self.started_at = time.time()
+        self._turn_marks: deque[dict[str, Any]] = deque(maxlen=history)
+
+    def add_probe(self, name: str, probe: Probe) -> None:
+        self.probes[name] = probe
+
+    @staticmethod
+    def start(frames: int = TRACE_FRAMES) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    @staticmethod
+    def tracing() -> bool:
+        return tracemalloc.is_tracing()
+
+    def _by_subsystem(self) -> dict[str, int]:
+        if not tracemalloc.is_tracing():
+            return {}
+        snap = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        totals: dict[str, int] = {}
+        for stat in snap.statistics('traceback'):
+            name = _classify(stat.traceback)
+            totals[name] = totals.get(name, 0) + stat.size
+        return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+
+    def _probe_all(self) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for name, probe in self.probes.items():
+            try:
+                out[name] = probe()
+            except Exception as e:  # 진단 때문에 앱이 죽으면 안 된다.
+                out[name] = {'error': repr(e)}
+        return out
+
+    def collect(self) -> dict[str, Any]:
+        traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            'ts': time.time(),
+            'uptime_s': time.time() - self.started_at,
+            'tracing': tracemalloc.is_tracing(),
+            'traced_bytes': traced,
+            'traced_peak_bytes': peak,
+            'by_subsystem': self._by_subsystem(),
+            'structures': self._probe_all(),
+        }
+
+    def mark_turn(self, turn_id: int) -> dict[str, Any]:
+        """turn 종료 시점의 상태를 기록하고, 직전 turn 대비 증가량을 돌려준다."""
+        report = self.collect()
+        report['turn_id'] = turn_id
+        prev = self._turn_marks[-1] if self._turn_marks else None
+        report['growth'] = self._growth(prev, report) if prev else {}
+        self._turn_marks.append(report)
+        return report
+
+    @staticmethod
+    def _growth(prev: dict[str, Any], cur: dict[str, Any]) -> dict[str, int]:
+        growth = {'traced_bytes': cur['traced_bytes'] - prev['traced_bytes']}
+        names = set(prev['by_subsystem']) | set(cur['by_subsystem'])
+        for name in names:
+            growth[name] = cur['by_subsystem'].get(name, 0) - prev['by_subsystem'].get(name, 0)
+        return growth
+
+    def summary(self) -> dict[str, Any]:
+        report = self.collect()
+        marks = list(self._turn_marks)
+        report['turns_marked'] = len(marks)
+        if len(marks) >= 2:
+            first, last = marks[0], marks[-1]
+            span = max(1, len(marks) - 1)
+            report['avg_growth_per_turn'] = {
+                k: v // span for k, v in self._growth(first, last).items()
+            }
+        report['last_turn_growth'] = marks[-1]['growth'] if marks else {}
+        return report
+
+    def dump_json(self, path: str) -> None:
+        """한 줄에 summary 하나씩(JSON lines) 덧붙인다."""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.summary(), default=str) + '\n')
+
+    def format_report(self, top: int = 8) -> list[str]:
+        s = self.summary()
+        lines = [f"traced: {_fmt_bytes(s['traced_bytes'])} (peak {_fmt_bytes(s['traced_peak_bytes'])})"]
+        if not s['tracing']:
+            lines.append('tracemalloc was not running; attribution starts now, run again after a few turns.')
+        for name, size in list(s['by_subsystem'].items())[:top]:
+            growth = s.get('avg_growth_per_turn', {}).get(name)
+            suffix = f'  ({_fmt_bytes(growth, signed=True)}/turn)' if growth is not None else ''
+            lines.append(f'  {name:<12} {_fmt_bytes(size):>10}{suffix}')
+        for name, info in s['structures'].items():
+            lines.append(f'  [{name}] ' + ', '.join(f'{k}={v}' for k, v in info.items()))
+        return lines
+
+
+def _fmt_bytes(n: int, signed: bool = False) -> str:
+    sign = ('+' if n >= 0 else '-') if signed else ('-' if n < 0 else '')
+    n = abs(n)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024 or unit == 'GiB':
+            return f'{sign}{n:.0f}{unit}' if unit == 'B' else f'{sign}{n:.1f}{unit}'
+        n /= 1024
+    return f'{sign}{n}'
+
+
+def checkpoint_probe(checkpointer: Any) -> Probe:
+    """MemorySaver의 storage/writes에 쌓인 checkpoint 수와 크기."""
+    def probe() -> dict[str, Any]:
+        storage = getattr(checkpointer, 'storage', None) or {}
+        writes = getattr(checkpointer, 'writes', None) or {}
+        count = sum(len(ckpts) for ns in storage.values() for ckpts in ns.values())
+        return {
+            'threads': len(storage),
+            'checkpoints': count,
+            'pending_writes': len(writes),
+            'approx_bytes': deep_sizeof(storage) + deep_sizeof(writes),
+        }
+    return probe
+
+
+def queue_probe(q: Any) -> Probe:
+    """queue 길이와, 아직 소비되지 않은 item들의 크기."""
+    def probe() -> dict[str, Any]:
+        pending = list(getattr(q, '_queue', ()))
+        return {'qsize': q.qsize(), 'maxsize': q.maxsize, 'approx_bytes': deep_sizeof(pending)}
+    return probe
@@ -1,42 +1,173 @@
 """
 langgraph agent에서 발생하는 event들, orchestrator 전용 데이터 도메인
+
+token 하나마다 event가 하나씩 만들어지므로 dict 대신 __slots__ class를 쓴다.
+- 소비하는 쪽은 match 문으로 kind(plain int, Kind.*)에 따라 dispatch 한다.
+  IntEnum 비교는 int 비교보다 느려서, EventKind는 표시/wire 용도로만 쓴다.
+- 직렬화는 to_wire()로 (kind, *fields) 형태의 tuple을 만든다.
+- 기존 dict 기반 코드를 위해 get()/[]/to_dict() view를 제공한다.
+- 모든 event는 어느 turn에서 나왔는지 turn_id를 들고 다닌다. (orchestrator가 채운다)
 """
 
-from dataclasses import dataclass
-from typing import Any, Literal, TypedDict, Union
+from enum import IntEnum
+from typing import Any, ClassVar, Mapping, Optional, Union
+
+
+class EventKind(IntEnum):
+    TOKEN = 1
+    TOOL_START = 2
+    TOOL_END = 3
+    INTERRUPT = 4
+    DONE = 5
+    ERROR = 6
+
+
+class Kind:
+    """hot path dispatch 용 int 상수. match 문에서 case Kind.TOKEN: 처럼 쓴다."""
+    TOKEN = int(EventKind.TOKEN)
+    TOOL_START = int(EventKind.TOOL_START)
+    TOOL_END = int(EventKind.TOOL_END)
+    INTERRUPT = int(EventKind.INTERRUPT)
+    DONE = int(EventKind.DONE)
+    ERROR = int(EventKind.ERROR)
+
+
+class BaseEvent:
+    __slots__ = ('turn_id',)
+
+    kind: ClassVar[int]
+    type: ClassVar[str]
+    # 생성자 순서와 같은 field 목록. turn_id는 항상 마지막.
+    _fields: ClassVar[tuple[str, ...]] = ('turn_id',)
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._fields = cls.__dict__.get('__slots__', ()) + ('turn_id',)
+
+    def to_dict(self) -> dict[str, Any]:
+        d: dict[str, Any] = {'type': self.type}
+        for name in self._fields:
+            d[name] = getattr(self, name)
+        return d
+
+    def to_wire(self) -> tuple:
+        return (self.kind, *(getattr(self, name) for name in self._fields))
+
+    # ------------- dict view (호환용)
+    def get(self, key: str, default: Any = None) -> Any:
+        if key == 'type':
+            return self.type
+        if key in self._fields:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'type':
+            return self.type
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in self._fields)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{n}={getattr(self, n)!r}' for n in self._fields)
+        return f'{type(self).__name__}({fields})'
 
-class TokenEvent(TypedDict, total=False):
-    type: Literal['token']
-    text: str
+    @property
+    def event_kind(self) -> EventKind:
+        return EventKind(self.kind)
 
 
-class ToolStartEvent(TypedDict, total=False):
-    type: Literal['tool_start']
-    tool: str
-    args: dict[str, Any]
+class TokenEvent(BaseEvent):
+    __slots__ = ('text',)
+    __match_args__ = ('text',)
+    kind = Kind.TOKEN
+    type = 'token'
 
+    def __init__(self, text: str, turn_id: Optional[int] = None):
+        self.text = text
+        self.turn_id = turn_id
 
-class ToolEndEvent(TypedDict, total=False):
-    type: Literal['tool_end']
-    tool: str
-    output_preview: Any
 
+class ToolStartEvent(BaseEvent):
+    __slots__ = ('tool', 'args', 'step', 'node', 'tags')
+    __match_args__ = ('tool', 'args')
+    kind = Kind.TOOL_START
+    type = 'tool_start'
 
-class InterruptEvent(TypedDict, total=False):
-    type: Literal['interrupt']
-    payload = dict
+    def __init__(self, tool: Optional[str], args: dict[str, Any],
+                 step: Optional[int] = None, node: Optional[str] = None, tags: Optional[list[str]] = None,
+                 turn_id: Optional[int] = None):
+        self.tool = tool
+        self.args = args
+        self.step = step
+        self.node = node
+        self.tags = tags
+        self.turn_id = turn_id
 
 
-class DoneEvent(TypedDict, total=False):
-    type: Literal['done']
+class ToolEndEvent(BaseEvent):
+    __slots__ = ('tool', 'output_preview')
+    __match_args__ = ('tool', 'output_preview')
+    kind = Kind.TOOL_END
+    type = 'tool_end'
+
+    def __init__(self, tool: Optional[str], output_preview: Any, turn_id: Optional[int] = None):
+        self.tool = tool
+        self.output_preview = output_preview
+        self.turn_id = turn_id
+
+
+class InterruptEvent(BaseEvent):
+    __slots__ = ('payload',)
+    __match_args__ = ('payload',)
+    kind = Kind.INTERRUPT
+    type = 'interrupt'
+
+    def __init__(self, payload: Any, turn_id: Optional[int] = None):
+        self.payload = payload
+        self.turn_id = turn_id
+
+
+class DoneEvent(BaseEvent):
+    __slots__ = ()
+    kind = Kind.DONE
+    type = 'done'
+
+    def __init__(self, turn_id: Optional[int] = None):
+        self.turn_id = turn_id
+
+
+class ErrorEvent(BaseEvent):
+    __slots__ = ('message',)
+    __match_args__ = ('message',)
+    kind = Kind.ERROR
+    type = 'error'
+
+    def __init__(self, message: str, turn_id: Optional[int] = None):
+        self.message = message
+        self.turn_id = turn_id
 
 
-class ErrorEvent(TypedDict, total=False):
-    type: Literal['error']
-    message: str
-    
-    
 DomainEvent = Union[
     TokenEvent, ToolStartEvent, ToolEndEvent, InterruptEvent, DoneEvent, ErrorEvent,
 ]
-    
\ No newline at end of file
+
+_BY_KIND: dict[int, type[BaseEvent]] = {
+    cls.kind: cls for cls in (TokenEvent, ToolStartEvent, ToolEndEvent, InterruptEvent, DoneEvent, ErrorEvent)
+}
+_BY_TYPE: dict[str, type[BaseEvent]] = {cls.type: cls for cls in _BY_KIND.values()}
+
+
+def from_wire(wire: Union[tuple, list]) -> DomainEvent:
+    kind, *values = wire
+    return _BY_KIND[kind](*values)
+
+
+def from_dict(d: Mapping[str, Any]) -> DomainEvent:
+    cls = _BY_TYPE[d['type']]
+    return cls(**{name: d.get(name) for name in cls._fields})
@@ -0,0 +1,279 @@
+"""
+LLM client들이 공유하는 async HTTP transport
+
+agent마다 ChatOpenAI를 새로 만들어도 같은 connection pool을 쓰도록
+하나의 httpx.AsyncClient를 프로세스 단위로 공유한다.
+"""
+
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+ResponseHook = Callable[[httpx.Response], Awaitable[None]]
+# 재시도 직전에 await 된다. scheduler가 pause/RPM budget을 확인하고 재시도 한 번을 요청 하나로 센다.
+RetryGate = Callable[[httpx.Request], Awaitable[None]]
+
+
+def _env_int(name: str, default: int) -> int:
+    val = os.getenv(name)
+    return int(val) if val else default
+
+
+def _env_float(name: str, default: float) -> float:
+    val = os.getenv(name)
+    return float(val) if val else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    val = os.getenv(name)
+    if val is None:
+        return default
+    return val.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass
+class HttpClientConfig:
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    connect_timeout: float = 5.0
+    read_timeout: float = 120.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 10.0
+
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+
+    @classmethod
+    def from_env(cls) -> 'HttpClientConfig':
+        """LLM_HTTP_* 환경변수로 기본값을 덮어쓴다."""
+        d = cls()
+        return cls(
+            max_connections=_env_int('LLM_HTTP_MAX_CONNECTIONS', d.max_connections),
+            max_keepalive_connections=_env_int('LLM_HTTP_MAX_KEEPALIVE', d.max_keepalive_connections),
+            keepalive_expiry=_env_float('LLM_HTTP_KEEPALIVE_EXPIRY', d.keepalive_expiry),
+            http2=_env_bool('LLM_HTTP2', d.http2),
+            connect_timeout=_env_float('LLM_HTTP_CONNECT_TIMEOUT', d.connect_timeout),
+            read_timeout=_env_float('LLM_HTTP_READ_TIMEOUT', d.read_timeout),
+            write_timeout=_env_float('LLM_HTTP_WRITE_TIMEOUT', d.write_timeout),
+            pool_timeout=_env_float('LLM_HTTP_POOL_TIMEOUT', d.pool_timeout),
+            max_retries=_env_int('LLM_HTTP_MAX_RETRIES', d.max_retries),
+            backoff_base=_env_float('LLM_HTTP_BACKOFF_BASE', d.backoff_base),
+            backoff_max=_env_float('LLM_HTTP_BACKOFF_MAX', d.backoff_max),
+        )
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout,
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+@dataclass
+class PoolStats:
+    requests_total: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    retries_total: int = 0
+    retried_statuses: dict[int, int] = field(default_factory=dict)
+    transport_errors: int = 0
+
+    def snapshot(self, transport: Optional[httpx.AsyncHTTPTransport], max_connections: int) -> dict[str, Any]:
+        open_conns, idle_conns = _pool_connections(transport)
+        active = open_conns - idle_conns
+        return {
+            'requests_total': self.requests_total,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'retries_total': self.retries_total,
+            'retried_statuses': dict(self.retried_statuses),
+            'transport_errors': self.transport_errors,
+            'connections_open': open_conns,
+            'connections_idle': idle_conns,
+            'connections_active': active,
+            'max_connections': max_connections,
+            'utilization': active / max_connections if max_connections else 0.0,
+        }
+
+
+def _pool_connections(transport: Optional[httpx.AsyncHTTPTransport]) -> tuple[int, int]:
+    """httpcore pool 내부를 들여다봐서 (open, idle) connection 수를 얻는다."""
+    pool = getattr(transport, '_pool', None)
+    conns = getattr(pool, 'connections', None) or []
+    idle = 0
+    for conn in conns:
+        is_idle = getattr(conn, 'is_idle', None)
+        if callable(is_idle) and is_idle():
+            idle += 1
+    return len(conns), idle
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    val = response.headers.get('retry-after')
+    if not val:
+        return None
+    try:
+        return max(0.0, float(val))
+    except ValueError:
+        return None
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    429/5xx와 connection 오류를 jitter가 섞인 exponential backoff로 재시도하는 transport
+    """
+
+    def __init__(self, config: HttpClientConfig, stats: PoolStats):
+        self.config = config
+        self.stats = stats
+        self.inner = httpx.AsyncHTTPTransport(
+            http2=config.http2,
+            limits=config.limits,
+            retries=0,
+        )
+        self.response_hooks: list[ResponseHook] = []
+        self.retry_gates: list[RetryGate] = []
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # full jitter: 여러 session이 같은 타이밍에 몰려서 재시도하지 않도록 한다.
+        cap = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        stats.requests_total += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self.inner.handle_async_request(request)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError):
+                    stats.transport_errors += 1
+                    if attempt >= self.config.max_retries:
+                        raise
+                    stats.retries_total += 1
+                    await asyncio.sleep(self._backoff(attempt, None))
+                    await self._before_retry(request)
+                    attempt += 1
+                    continue
+
+                for hook in self.response_hooks:
+                    await hook(response)
+
+                if response.status_code not in RETRY_STATUSES or attempt >= self.config.max_retries:
+                    return response
+
+                stats.retries_total += 1
+                stats.retried_statuses[response.status_code] = stats.retried_statuses.get(response.status_code, 0) + 1
+                delay = self._backoff(attempt, _retry_after(response))
+                await response.aclose()
+                await asyncio.sleep(delay)
+                await self._before_retry(request)
+                attempt += 1
+        finally:
+            stats.in_flight -= 1
+
+    async def _before_retry(self, request: httpx.Request) -> None:
+        for gate in self.retry_gates:
+            await gate(request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class SharedHttpClient:
+    def __init__(self, config: Optional[HttpClientConfig] = None):
+        self.config = config or HttpClientConfig.from_env()
+        if self.config.http2 and not _h2_available():
+            # httpx[http2] 없이 http2=True를 주면 transport 생성 시점에 터진다.
+            self.config.http2 = False
+        self.stats = PoolStats()
+        self.transport = RetryTransport(self.config, self.stats)
+        self.client = httpx.AsyncClient(transport=self.transport, timeout=self.config.timeout)
+        self.created_at = time.monotonic()
+
+    def add_response_hook(self, hook: ResponseHook) -> None:
+        self.transport.response_hooks.append(hook)
+
+    def add_retry_gate(self, gate: RetryGate) -> None:
+        self.transport.retry_gates.append(gate)
+
+    def pool_stats(self) -> dict[str, Any]:
+        stats = self.stats.snapshot(self.transport.inner, self.config.max_connections)
+        stats['http2'] = self.config.http2
+        return stats
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_shared: Optional[SharedHttpClient] = None
+
+
+def get_shared_client(config: Optional[HttpClientConfig] = None) -> SharedHttpClient:
+    """
+    프로세스 전체에서 공유하는 client를 돌려준다. config는 최초 생성 시에만 반영된다.
+    """
+    global _shared
+    if _shared is None:
+        _shared = SharedHttpClient(config)
+    return _shared
+
+
+def llm_client_kwargs() -> dict[str, Any]:
+    """
+    ChatOpenAI 생성자에 넘길 transport 관련 kwargs.
+    재시도는 RetryTransport가 맡으므로 openai SDK 쪽 재시도는 끈다.
+    """
+    shared = get_shared_client()
+    return {
+        'http_async_client': shared.client,
+        'timeout': shared.config.timeout,
+        'max_retries': 0,
+    }
+
+
+def pool_stats() -> dict[str, Any]:
+    return get_shared_client().pool_stats()
+
+
+async def aclose_shared_client() -> None:
+    global _shared
+    if _shared is not None:
+        await _shared.aclose()
+        _shared = None
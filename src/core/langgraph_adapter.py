@@ -1,6 +1,6 @@
 
 from typing import Any, AsyncIterator, Dict, Mapping, Optional
-from core.domain import InterruptEvent, TokenEvent, ToolEndEvent, ToolStartEvent
+from core.domain import DomainEvent, InterruptEvent, TokenEvent, ToolEndEvent, ToolStartEvent
 
 def _extract_text(data: Mapping[str, Any]) -> Optional[str]:
     ch = data.get('chunk')
@@ -10,7 +10,7 @@ def _extract_text(data: Mapping[str, Any]) -> Optional[str]:
     text = getattr(ch, 'content', None)
     return text if isinstance(text, str) and text else None
 
-def _start_payload(ev: dict[str, Any]) -> dict[str, Any]:
+def _start_payload(ev: dict[str, Any]) -> ToolStartEvent:
     data = ev.get('data') or {}
     meta = ev.get('metadata') or {}
     tool_input = data.get('input') or {}
@@ -25,17 +25,16 @@ def _start_payload(ev: dict[str, Any]) -> dict[str, Any]:
             args['content_len'] = len(content_val)
             args['content_preview'] = content_val if len(content_val) <= 80 else content_val[:77] + '...'
     
-    return {
-        'type': 'tool_start',
-        'tool': ev.get('name'),
-        'args': args,
-        'step': meta.get('langgraph_step'),
-        'node': meta.get('langgraph_node'),
-        'tags': ev.get('tags')
-    }
+    return ToolStartEvent(
+        tool=ev.get('name'),
+        args=args,
+        step=meta.get('langgraph_step'),
+        node=meta.get('langgraph_node'),
+        tags=ev.get('tags'),
+    )
     
 
-def _end_payload(ev: dict[str, Any]) -> dict[str, Any]:
+def _end_payload(ev: dict[str, Any]) -> ToolEndEvent:
     data = ev.get('data') or {}
     out = data.get('output')
     
@@ -43,24 +42,20 @@ def _end_payload(ev: dict[str, Any]) -> dict[str, Any]:
     if isinstance(out_preview, str) and len(out_preview) > 120:
         out_preview = out_preview[:117] + '...'
     
-    return {
-        'type': 'tool_end',
-        'tool': ev.get('name'),
-        'out_preview': out_preview,
-    }
+    return ToolEndEvent(tool=ev.get('name'), output_preview=out_preview)
 
 def _extract_interrupt(data: Mapping[str, Any]) -> Optional[InterruptEvent]:
     ch = data.get('chunk')
     if isinstance(ch, dict):
         intr = ch.get('__interrupt__')
         if intr:
-            return {'type': 'interrupt', 'payload': intr}
+            return InterruptEvent(intr)
     
     return None
     
 
 
-async def adapt_events(stream: AsyncIterator[Dict[str, Any]]):
+async def adapt_events(stream: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[DomainEvent]:
     """
     langchain의 astream_events를 orchestrator가 소비할 DomainEvent로 변환
     """
@@ -70,13 +65,13 @@ async def adapt_events(stream: AsyncIterator[Dict[str, Any]]):
         
         intr = _extract_interrupt(data)
         if intr:
-            yield {'type': 'interrupt', 'payload': intr}
+            yield intr
             continue
         
         if event == 'on_chat_model_stream':
             text = _extract_text(data)
             if text:
-                yield {'type': 'token', 'text': text}
+                yield TokenEvent(text)
             continue
 
         elif event == 'on_tool_start':
@@ -1,49 +1,134 @@
 import asyncio
-from typing import Any, Dict
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Optional
 
 from core.agents.file_creator import build_agent
-from core.domain import DomainEvent, DoneEvent, InterruptEvent, TokenEvent, ToolEndEvent, ToolStartEvent
+from core.domain import DomainEvent, DoneEvent, Kind
 from langchain_core.messages import HumanMessage
 
 from langgraph.types import Command
 
 from core.langgraph_adapter import adapt_events
+from core.rate_limiter import Priority
+from core.replay import StreamRecorder
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-class Orchestrator:
-    def __init__(self, events_q: asyncio.Queue, cmd_q: asyncio.Queue):
-        self.agent = build_agent('gpt-4o')
-        self.config = {'configurable': {'thread_id': 'conv-1'}} # TODO: thread id 조정 필요
-        self.events_q = events_q
-        self.cmd_q = cmd_q
+class RunHandle:
+    """
+    turn 하나에 대한 논리적인 event stream.
+    
+    LangGraph는 interrupt 이후 Command(resume=...)로 astream_events를 다시 호출해야 재개된다.
+    RunHandle은 이 segment들을 이어 붙여서 소비하는 쪽에는 turn 당 stream 하나로 보이게 한다.
+    - interrupt를 내보낸 segment는 그 자리에서 aclose() 해서 graph run/callback을 바로 정리한다.
+      (break로 빠져나오면 GC 될 때까지 generator가 살아 있다.)
+    - resume 값을 받은 시점부터 재개된 segment의 첫 event까지를 resume latency로 기록한다.
+    """
+    
+    def __init__(self, orch: 'Orchestrator', user_input: str, turn_id: Optional[int] = None,
+                 priority: Optional[int] = None):
+        self.orch = orch
+        self.user_input = user_input
+        self.turn_id = turn_id
+        self.config = orch.config
+        if priority is not None:
+            self.config = {'configurable': {**orch.config['configurable'], 'priority': int(priority)}}
         
-    async def _emit(self, ev: Dict[str, Any]):
-        await self.events_q.put(ev)
+    def _open(self, payload: Any) -> AsyncIterator[dict[str, Any]]:
+        stream = self.orch.agent.astream_events(payload, config=self.config, version='v2')
+        if self.orch.recorder is not None:
+            stream = self.orch.recorder.record(stream)
+        return stream
     
-    async def run(self, user_input: str):
-        payload = {"messages": [HumanMessage(content=user_input)]}
+    async def __aiter__(self) -> AsyncIterator[DomainEvent]:
+        payload: Any = {"messages": [HumanMessage(content=self.user_input)]}
+        resumed_at: Optional[float] = None
         
         while True:
-            intr = False
-            stream = self.agent.astream_events(payload, config=self.config, version='v2')
+            interrupted = False
+            stream = self._open(payload)
+            events = adapt_events(stream)
+            try:
+                async for ev in events:
+                    if resumed_at is not None:
+                        self._record_resume(resumed_at)
+                        resumed_at = None
+                    
+                    ev.turn_id = self.turn_id
+                    yield ev
+                    
+                    if ev.kind == Kind.INTERRUPT:
+                        interrupted = True
+                        break
+            finally:
+                await events.aclose()
+                aclose = getattr(stream, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
             
-            async for ev in adapt_events(stream):    
-                await self._emit(ev)
-                
-                if ev.get('type') == 'interrupt':
-                    intr = True
-                    await self.cmd_q.put(True)
-                    resume = await self.cmd_q.get()
-                    payload = Command(resume = resume)
-                    break
+            if resumed_at is not None:
+                # 재개된 segment가 event 없이 끝난 경우
+                self._record_resume(resumed_at)
+                resumed_at = None
                     
-            if not intr:
+            if not interrupted:
                 break
             
-        await self._emit({'type': 'done'})
+            resume = await self.orch.cmd_q.get()
+            resumed_at = time.perf_counter()
+            payload = Command(resume=resume)
+        
+    def _record_resume(self, resumed_at: float) -> None:
+        latency = time.perf_counter() - resumed_at
+        self.orch._resume_latencies.append(latency)
+
+
+class Orchestrator:
+    def __init__(self, events_q: asyncio.Queue, cmd_q: asyncio.Queue, agent: Any = None, thread_id: str = 'conv-1',
+                 recorder: Optional[StreamRecorder] = None, priority: int = Priority.INTERACTIVE):
+        """
+        agent를 넘기면 compile 된 graph를 여러 orchestrator(session)가 같이 쓴다.
+        session 구분은 thread_id(checkpoint key)로 한다.
+        recorder를 넘기면 raw event stream을 파일로 녹화한다. (core.replay)
+        priority는 LLM scheduler에서 이 session의 기본 우선순위. turn마다 run(priority=)으로 바꿀 수 있다.
+        configurable은 checkpoint metadata에 저장되므로 Priority가 아니라 int로 넣는다.
+        """
+        self.agent = agent if agent is not None else build_agent('gpt-4o')
+        self.config = {'configurable': {'thread_id': thread_id, 'priority': int(priority)}}
+        self.events_q = events_q
+        self.cmd_q = cmd_q
+        self.recorder = recorder
+        self._resume_latencies: deque[float] = deque(maxlen=256)
+        
+    async def _emit(self, ev: DomainEvent):
+        await self.events_q.put(ev)
+    
+    def start(self, user_input: str, turn_id: Optional[int] = None, priority: Optional[int] = None) -> RunHandle:
+        return RunHandle(self, user_input, turn_id, priority)
+    
+    async def run(self, user_input: str, turn_id: Optional[int] = None, priority: Optional[int] = None):
+        """
+        turn 하나를 끝까지 실행한다. 내보내는 모든 event에 turn_id가 붙는다.
+        """
+        async for ev in self.start(user_input, turn_id, priority):
+            await self._emit(ev)
+            
+        await self._emit(DoneEvent(turn_id))
+        
+    def resume_stats(self) -> dict[str, float]:
+        """approve/deny를 받은 뒤 재개된 segment의 첫 event까지 걸린 시간. (최근 256회)"""
+        lat = sorted(self._resume_latencies)
+        if not lat:
+            return {'count': 0}
+        return {
+            'count': len(lat),
+            'avg_ms': round(sum(lat) / len(lat) * 1000, 1),
+            'p95_ms': round(lat[int(len(lat) * 0.95)] * 1000, 1),
+            'max_ms': round(lat[-1] * 1000, 1),
+        }
 
 
 #--------------- test 용
@@ -51,19 +136,20 @@ async def consume(q: asyncio.Queue, orch: Orchestrator):
     while True:
         ev = await q.get()
         
-        etype = ev.get("type")
-        if etype == "token":
-            print(ev.get("text", ""), end="", flush=True)
-        elif etype == "tool_start":
-            print(f"\n[tool start] {ev.get('tool')} {dict(ev.get('args') or {})}")
-        elif etype == "tool_end":
-            print(f"[tool end] {ev.get('tool')} -> {ev.get('output_preview')!r}")
-        elif etype == "interrupt":
-            print(f"\n[interrupt] {dict(ev.get('payload') or {})}")
-        elif etype == "error":
-            print(f"\n[error] {ev.get('message')}")
-        elif etype == "done":
-            break
+        match ev.kind:
+            case Kind.TOKEN:
+                print(ev.text, end="", flush=True)
+            case Kind.TOOL_START:
+                print(f"\n[tool start] {ev.tool} {dict(ev.args or {})}")
+            case Kind.TOOL_END:
+                print(f"[tool end] {ev.tool} -> {ev.output_preview!r}")
+            case Kind.INTERRUPT:
+                print(f"\n[interrupt] {ev.payload!r}")
+                await orch.cmd_q.put(True)
+            case Kind.ERROR:
+                print(f"\n[error] {ev.message}")
+            case Kind.DONE:
+                break
 
         
 async def main():
@@ -9,6 +9,7 @@ from langgraph.types import Command
 from langchain.tools import tool
 
 from core.agents.file_creator import build_agent
+from core.http_client import llm_client_kwargs
 
 
 def _tool_start_payload(ev: dict) -> dict:
@@ -70,7 +71,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 def build_supervisor(agents: list[any], model: str):
-    llm = ChatOpenAI(model=model, streaming=True)
+    llm = ChatOpenAI(model=model, streaming=True, **llm_client_kwargs())
     
     workflow = create_supervisor(
         agents,
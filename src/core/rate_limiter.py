@@ -0,0 +1,330 @@
+"""
+provider rate limit(RPM/TPM)을 고려해서 LLM 호출을 줄 세우는 scheduler
+
+모든 session의 LLM 호출은 LLMScheduler.slot()을 거쳐서 나간다.
+- 우선순위가 높은(값이 작은) 요청이 먼저 나간다. (interactive > batch)
+- 같은 우선순위 안에서는 session끼리 번갈아가며 나간다.
+- 응답 header(x-ratelimit-*)와 429를 보고 budget을 보정해서, 각 session이 따로 재시도하지 않게 한다.
+- RetryTransport의 재시도도 before_retry()를 거치므로 pause를 지키고 RPM budget을 하나씩 쓴다.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, AsyncIterator, Mapping, Optional
+
+import httpx
+
+from core.http_client import get_shared_client
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BATCH = 10
+
+
+@dataclass
+class RateLimitConfig:
+    requests_per_minute: int = 500
+    tokens_per_minute: int = 30_000
+    max_concurrency: int = 0  # 0이면 제한 없음
+
+    @classmethod
+    def from_env(cls) -> 'RateLimitConfig':
+        d = cls()
+        return cls(
+            requests_per_minute=int(os.getenv('LLM_RPM') or d.requests_per_minute),
+            tokens_per_minute=int(os.getenv('LLM_TPM') or d.tokens_per_minute),
+            max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY') or d.max_concurrency),
+        )
+
+
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def _parse_duration(val: Optional[str]) -> Optional[float]:
+    """openai 형식의 reset header('1s', '6m0s', '20ms')를 초 단위로 바꾼다."""
+    if not val:
+        return None
+    try:
+        return float(val)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(val)
+    if not parts:
+        return None
+    return sum(float(num) * _DURATION_UNITS[unit] for num, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> Optional[int]:
+    val = headers.get(name)
+    try:
+        return int(val) if val is not None else None
+    except ValueError:
+        return None
+
+
+class _Bucket:
+    """분 단위 limit을 초 단위로 채워지는 token bucket으로 다룬다."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self.refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate else float('inf')
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+    def give_back(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, limit: Optional[int], remaining: Optional[int], now: float) -> None:
+        """provider가 알려준 limit/remaining으로 bucket 상태를 맞춘다."""
+        if limit:
+            self.capacity = float(limit)
+            self.rate = limit / 60.0
+        if remaining is not None:
+            self.refill(now)
+            self.tokens = min(self.tokens, float(remaining))
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    vtime: int
+    seq: int
+    session_id: str = field(compare=False)
+    tokens: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    fut: asyncio.Future = field(compare=False, repr=False)
+
+
+@dataclass
+class Ticket:
+    session_id: str
+    priority: int
+    tokens: int
+    wait_s: float
+
+
+class LLMScheduler:
+    def __init__(self, config: Optional[RateLimitConfig] = None):
+        self.config = config or RateLimitConfig.from_env()
+        self._rpm = _Bucket(self.config.requests_per_minute)
+        self._tpm = _Bucket(self.config.tokens_per_minute)
+
+        self._heap: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._vtime: dict[str, int] = {}
+        self._global_vtime = 0
+
+        self._active = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self._waits: deque[float] = deque(maxlen=256)
+        self.granted_total = 0
+        self.throttled_total = 0
+
+    # ---------------- acquire / release
+    async def acquire(self, session_id: str, priority: int = Priority.INTERACTIVE, est_tokens: int = 0) -> Ticket:
+        loop = asyncio.get_running_loop()
+        start = max(self._global_vtime, self._vtime.get(session_id, 0))
+        self._vtime[session_id] = start + 1
+
+        waiter = _Waiter(
+            priority=int(priority),
+            vtime=start,
+            seq=next(self._seq),
+            session_id=session_id,
+            tokens=max(0, est_tokens),
+            enqueued_at=time.monotonic(),
+            fut=loop.create_future(),
+        )
+        heapq.heappush(self._heap, waiter)
+        self._dispatch()
+
+        try:
+            await waiter.fut
+        except asyncio.CancelledError:
+            if waiter.fut.done() and not waiter.fut.cancelled():
+                # grant와 cancel이 엇갈린 경우, 받은 자리를 돌려준다.
+                self._release(waiter.tokens, 0)
+            else:
+                waiter.fut.cancel()
+                self._dispatch()
+            raise
+
+        wait_s = time.monotonic() - waiter.enqueued_at
+        self._waits.append(wait_s)
+        return Ticket(session_id, waiter.priority, waiter.tokens, wait_s)
+
+    def release(self, ticket: Ticket, used_tokens: Optional[int] = None) -> None:
+        """실제 사용량(usage_metadata)을 받으면 추정치와의 차이만큼 TPM budget을 보정한다."""
+        self._release(ticket.tokens, ticket.tokens if used_tokens is None else used_tokens)
+
+    def _release(self, reserved: int, used: int) -> None:
+        self._active -= 1
+        if used < reserved:
+            self._tpm.give_back(reserved - used)
+        elif used > reserved:
+            self._tpm.take(used - reserved)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, session_id: str, priority: int = Priority.INTERACTIVE, est_tokens: int = 0) -> AsyncIterator['_Slot']:
+        ticket = await self.acquire(session_id, priority, est_tokens)
+        s = _Slot(ticket)
+        try:
+            yield s
+        finally:
+            self.release(ticket, s.used_tokens)
+
+    # ---------------- dispatch
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        delay: Optional[float] = None
+        while self._heap:
+            head = self._heap[0]
+            if head.fut.done():
+                heapq.heappop(self._heap)
+                continue
+
+            now = time.monotonic()
+            if now < self._paused_until:
+                delay = self._paused_until - now
+                break
+            if self.config.max_concurrency and self._active >= self.config.max_concurrency:
+                break  # release 될 때 다시 dispatch
+            wait = max(self._rpm.wait_time(1, now), self._tpm.wait_time(head.tokens, now))
+            if wait > 0:
+                self.throttled_total += 1
+                delay = wait
+                break
+
+            heapq.heappop(self._heap)
+            self._rpm.take(1)
+            self._tpm.take(min(head.tokens, self._tpm.capacity))
+            self._active += 1
+            self.granted_total += 1
+            self._global_vtime = max(self._global_vtime, head.vtime)
+            if self._vtime.get(head.session_id, 0) <= self._global_vtime:
+                self._vtime.pop(head.session_id, None)
+            head.fut.set_result(None)
+
+        if delay is not None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    # ---------------- provider feedback
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        now = time.monotonic()
+        self._rpm.sync(
+            _header_int(headers, 'x-ratelimit-limit-requests'),
+            _header_int(headers, 'x-ratelimit-remaining-requests'),
+            now,
+        )
+        self._tpm.sync(
+            _header_int(headers, 'x-ratelimit-limit-tokens'),
+            _header_int(headers, 'x-ratelimit-remaining-tokens'),
+            now,
+        )
+
+    def pause_for(self, seconds: float) -> None:
+        """429를 받으면 모든 session의 요청을 같이 멈춘다."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def before_retry(self, request: httpx.Request) -> None:
+        """
+        slot을 쥔 채로 transport 안에서 재시도하는 요청도 pause가 풀리고 RPM budget이 생길 때까지 기다린다.
+        slot은 이미 받은 상태이므로 줄을 다시 서지는 않고, 재시도 한 번을 요청 하나로 센다.
+        """
+        while True:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, self._rpm.wait_time(1, now))
+            if wait <= 0:
+                break
+            self.throttled_total += 1
+            await asyncio.sleep(wait)
+        self._rpm.take(1)
+
+    async def on_response(self, response: httpx.Response) -> None:
+        headers = response.headers
+        self.observe_headers(headers)
+        if response.status_code == 429:
+            pause = (
+                _parse_duration(headers.get('retry-after'))
+                or _parse_duration(headers.get('x-ratelimit-reset-requests'))
+                or _parse_duration(headers.get('x-ratelimit-reset-tokens'))
+                or 1.0
+            )
+            self.pause_for(pause)
+        if self._heap:
+            self._dispatch()
+
+    # ---------------- metrics
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        waits = sorted(self._waits)
+        queued = [w for w in self._heap if not w.fut.done()]
+        return {
+            'queued': len(queued),
+            'queued_interactive': sum(1 for w in queued if w.priority <= Priority.INTERACTIVE),
+            'active': self._active,
+            'granted_total': self.granted_total,
+            'throttled_total': self.throttled_total,
+            'paused_s': max(0.0, self._paused_until - now),
+            'rpm_available': self._rpm.tokens,
+            'tpm_available': self._tpm.tokens,
+            'wait_avg_s': sum(waits) / len(waits) if waits else 0.0,
+            'wait_p95_s': waits[int(len(waits) * 0.95)] if waits else 0.0,
+            'wait_max_s': waits[-1] if waits else 0.0,
+            'oldest_queued_s': max((now - w.enqueued_at for w in queued), default=0.0),
+        }
+
+
+class _Slot:
+    def __init__(self, ticket: Ticket):
+        self.ticket = ticket
+        self.used_tokens: Optional[int] = None
+
+
+def estimate_tokens(texts: list[str], completion_reserve: int = 256) -> int:
+    """tokenizer 없이 대략 4글자 = 1 token으로 추정한다."""
+    return sum(len(t) for t in texts) // 4 + completion_reserve
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_scheduler(config: Optional[RateLimitConfig] = None) -> LLMScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(config)
+        shared = get_shared_client()
+        shared.add_response_hook(_scheduler.on_response)
+        shared.add_retry_gate(_scheduler.before_retry)
+    return _scheduler
@@ -0,0 +1,131 @@
+"""
+astream_events(v2) raw stream 녹화/재생
+
+StreamRecorder는 orchestrator가 받는 raw event를 그대로(event 간 시간 간격 포함) gzip JSON lines로 저장한다.
+ReplayAgent는 compile 된 graph 대신 Orchestrator에 넣으면 녹화된 stream을 1x, Nx, 최대 속도로 다시 흘려준다.
+network 없이 실제 session의 latency 문제를 재현하거나 UI pump를 부하 테스트할 때 쓴다.
+
+file format (gzip, 한 줄에 JSON 하나)
+    {"version": 1, "created": ...}             header
+    {"seg": 0, "dt": 0.012, "ev": {...}}       astream_events 호출(segment) 번호, 직전 event와의 간격(초)
+"""
+
+import asyncio
+import dataclasses
+import gzip
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Optional
+
+FORMAT_VERSION = 1
+
+# 최대 속도 재생에서도 이 개수마다 한 번은 loop에 양보해서 UI가 그려지게 한다.
+YIELD_EVERY = 64
+
+
+def to_jsonable(obj: Any) -> Any:
+    """message chunk, Interrupt 같은 객체를 adapter가 읽는 필드 위주로 JSON에 담을 수 있게 바꾼다."""
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        d = {f.name: to_jsonable(getattr(obj, f.name)) for f in dataclasses.fields(obj)}
+        d['__dc__'] = type(obj).__name__
+        return d
+    if hasattr(obj, 'content'):
+        d = {'__msg__': type(obj).__name__, 'content': to_jsonable(obj.content)}
+        for attr in ('name', 'tool_call_id', 'tool_calls'):
+            val = getattr(obj, attr, None)
+            if val:
+                d[attr] = to_jsonable(val)
+        return d
+    return repr(obj)
+
+
+def from_jsonable(obj: Any) -> Any:
+    if isinstance(obj, list):
+        return [from_jsonable(v) for v in obj]
+    if isinstance(obj, dict):
+        if '__msg__' in obj:
+            return SimpleNamespace(**{k: from_jsonable(v) for k, v in obj.items()})
+        return {k: from_jsonable(v) for k, v in obj.items()}
+    return obj
+
+
+class StreamRecorder:
+    def __init__(self, path: str):
+        self.path = path
+        self._f = gzip.open(path, 'wt', encoding='utf-8')
+        self._f.write(json.dumps({'version': FORMAT_VERSION, 'created': time.time()}) + '\n')
+        self._seg = -1
+
+    async def record(self, stream: AsyncIterator[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+        """
+        stream을 그대로 흘려보내면서 저장한다. astream_events 호출 하나가 segment 하나.
+        이 generator가 aclose() 되면 안쪽 stream도 닫아서 graph run이 GC를 기다리지 않게 한다.
+        """
+        self._seg += 1
+        seg = self._seg
+        last = time.monotonic()
+        try:
+            async for ev in stream:
+                now = time.monotonic()
+                line = {'seg': seg, 'dt': round(now - last, 6), 'ev': to_jsonable(ev)}
+                self._f.write(json.dumps(line, separators=(',', ':'), ensure_ascii=False) + '\n')
+                last = now
+                yield ev
+        finally:
+            self._f.flush()
+            aclose = getattr(stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def load_segments(path: str) -> list[list[tuple[float, dict[str, Any]]]]:
+    segments: list[list[tuple[float, dict[str, Any]]]] = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f'unsupported recording version: {header.get("version")}')
+        for line in f:
+            rec = json.loads(line)
+            seg = rec['seg']
+            while len(segments) <= seg:
+                segments.append([])
+            segments[seg].append((rec['dt'], rec['ev']))
+    return segments
+
+
+class ReplayAgent:
+    """
+    Orchestrator가 쓰는 astream_events만 흉내 내는 agent.
+    호출될 때마다 다음 segment를 재생한다. speed=0이면 간격 없이 최대 속도로 흘린다.
+    """
+
+    checkpointer = None
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.segments = load_segments(path)
+        self.speed = speed
+        self._next = 0
+
+    def astream_events(self, payload: Any, config: Optional[dict] = None, version: str = 'v2') -> AsyncIterator[dict[str, Any]]:
+        seg = self.segments[self._next] if self._next < len(self.segments) else []
+        self._next += 1
+        return self._play(seg)
+
+    async def _play(self, seg: list[tuple[float, dict[str, Any]]]) -> AsyncIterator[dict[str, Any]]:
+        speed = self.speed
+        for i, (dt, ev) in enumerate(seg):
+            if speed > 0 and dt > 0:
+                await asyncio.sleep(dt / speed)
+            elif i % YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+            yield from_jsonable(ev)
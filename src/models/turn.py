@@ -12,5 +12,6 @@ class Turn:
     turn_id: int
     user_text: str = ""
     assistant_buffer: str = ""
-    status: str = 'idle'
+    status: str = 'idle'  # idle | queued | thinking | streaming | final
     tool_logs: list[str] = field(default_factory=list)
+    queued: bool = False  # submitted while another turn was running
@@ -0,0 +1,221 @@
+"""
+Orchestrator를 socket으로 여는 server 모드
+
+하나의 프로세스에서 agent graph를 한 번만 만들어두고, 접속한 client마다
+Orchestrator(session)를 붙여 DomainEvent를 newline-delimited JSON으로 흘려보낸다.
+
+client -> server
+    {"type": "prompt", "text": "...", "priority": "batch"}   priority는 생략하면 interactive
+    {"type": "approve", "value": true}   interrupt를 받은 뒤에만 유효하다.
+    {"type": "stats"}
+server -> client
+    {"type": "session", "id": "..."}   접속 직후 한 번
+    {"type": "stats", "resume": {...}, "scheduler": {...}, "http_pool": {...}}   stats 요청에 대한 응답
+    {"type": "queued", "turn_id": 1, "ahead": 0}   prompt를 받을 때마다. ahead는 먼저 실행될 turn 수(실행 중인 turn 포함).
+                                                  이후 event의 turn_id로 구분한다.
+    DomainEvent ({"type": "token", ...}, {"type": "done"}, ...)
+    --compact 이면 DomainEvent.to_wire() 형태 ([1, "text"], [5], ...)
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from typing import Any, Optional
+
+from core.agents.file_creator import build_agent
+from core.domain import BaseEvent, DoneEvent, ErrorEvent, Kind
+from core.http_client import pool_stats
+from core.orchestrator import Orchestrator
+from core.rate_limiter import Priority, get_scheduler
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json으로 동작
+    orjson = None
+
+
+MAX_LINE_BYTES = 1 << 20
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str) + b'\n'
+    return json.dumps(obj, default=str, ensure_ascii=False, separators=(',', ':')).encode() + b'\n'
+
+
+def loads(line: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+class ClientSession:
+    """
+    client 하나에 대응하는 session.
+    events_q를 bounded로 두어서 client가 느리면 orchestrator의 _emit이 기다리게 된다. (backpressure)
+    """
+
+    def __init__(self, server: 'OrchestratorServer', session_id: str,
+                 reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.server = server
+        self.session_id = session_id
+        self.reader = reader
+        self.writer = writer
+        self.events_q: asyncio.Queue = asyncio.Queue(maxsize=server.queue_size)
+        self.cmd_q: asyncio.Queue = asyncio.Queue()
+        self.orchestrator = Orchestrator(self.events_q, self.cmd_q, agent=server.agent, thread_id=session_id)
+        # 실행 중에 들어온 prompt는 순서대로 쌓아뒀다가 하나씩 실행한다.
+        self.prompts: asyncio.Queue[tuple[int, str, Priority]] = asyncio.Queue()
+        self._turn_ids = itertools.count(1)
+        self._running_turn_id: Optional[int] = None
+        # client에게 interrupt를 보낸 뒤 approve를 기다리는 중인지. 이 때만 approve를 cmd_q로 넘긴다.
+        self._awaiting_approval = False
+
+    async def serve(self) -> None:
+        writer_task = asyncio.create_task(self._write_loop())
+        run_task = asyncio.create_task(self._run_loop())
+        try:
+            await self.events_q.put({'type': 'session', 'id': self.session_id})
+            await self._read_loop()
+        finally:
+            for task in (run_task, writer_task):
+                task.cancel()
+            # 실행 중이던 turn이 완전히 멈춘 뒤에 checkpoint를 지워야 다시 쓰이지 않는다.
+            await asyncio.gather(run_task, writer_task, return_exceptions=True)
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                line = await self.reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                await self._error('line too long')
+                return
+            if not line:
+                return
+            if not line.strip():
+                continue
+
+            try:
+                msg = loads(line)
+            except ValueError:
+                await self._error('invalid json')
+                continue
+
+            mtype = msg.get('type') if isinstance(msg, dict) else None
+            if mtype == 'prompt':
+                try:
+                    priority = Priority[str(msg.get('priority') or 'interactive').upper()]
+                except KeyError:
+                    await self._error(f"unknown priority: {msg.get('priority')}")
+                    continue
+                turn_id = next(self._turn_ids)
+                ahead = self.prompts.qsize() + (1 if self._running_turn_id is not None else 0)
+                await self.prompts.put((turn_id, str(msg.get('text', '')), priority))
+                await self.events_q.put({'type': 'queued', 'turn_id': turn_id, 'ahead': ahead})
+            elif mtype == 'approve':
+                if not self._awaiting_approval:
+                    await self._error('no pending interrupt to approve')
+                    continue
+                self._awaiting_approval = False
+                await self.cmd_q.put(bool(msg.get('value')))
+            elif mtype == 'stats':
+                await self.events_q.put({
+                    'type': 'stats',
+                    'resume': self.orchestrator.resume_stats(),
+                    'scheduler': get_scheduler().stats(),
+                    'http_pool': pool_stats(),
+                })
+            else:
+                await self._error(f'unknown command: {mtype}')
+
+    async def _run_loop(self) -> None:
+        while True:
+            turn_id, text, priority = await self.prompts.get()
+            # 이전 turn에 남은 approve가 이번 turn의 interrupt에 쓰이지 않게 비운다.
+            while not self.cmd_q.empty():
+                self.cmd_q.get_nowait()
+            self._awaiting_approval = False
+            self._running_turn_id = turn_id
+            try:
+                await self.orchestrator.run(text, turn_id, priority)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._error(str(e), turn_id)
+                await self.events_q.put(DoneEvent(turn_id))
+            finally:
+                self._running_turn_id = None
+
+    async def _error(self, message: str, turn_id: Optional[int] = None) -> None:
+        await self.events_q.put(ErrorEvent(message, turn_id))
+
+    async def _write_loop(self) -> None:
+        while True:
+            ev = await self.events_q.get()
+            if isinstance(ev, BaseEvent):
+                if ev.kind == Kind.INTERRUPT:
+                    self._awaiting_approval = True
+                ev = ev.to_wire() if self.server.compact else ev.to_dict()
+            self.writer.write(dumps(ev))
+            await self.writer.drain()
+
+
+class OrchestratorServer:
+    def __init__(self, model: str = 'gpt-4o', queue_size: int = 256, compact: bool = False):
+        self.agent = build_agent(model)
+        self.queue_size = queue_size
+        self.compact = compact
+        self.sessions: dict[str, ClientSession] = {}
+        self._ids = itertools.count(1)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        session_id = f'sock-{os.getpid()}-{next(self._ids)}'
+        session = ClientSession(self, session_id, reader, writer)
+        self.sessions[session_id] = session
+        try:
+            await session.serve()
+        finally:
+            self.sessions.pop(session_id, None)
+            # thread_id가 접속마다 새로 만들어지므로 끊긴 session의 checkpoint는 다시 쓰이지 않는다.
+            if self.agent.checkpointer is not None:
+                self.agent.checkpointer.delete_thread(session_id)
+
+    async def serve_tcp(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_unix(self, path: str) -> None:
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self._handle, path, limit=MAX_LINE_BYTES)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the orchestrator event protocol over a socket.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help='listen on a unix socket path instead of tcp')
+    parser.add_argument('--model', default='gpt-4o')
+    parser.add_argument('--queue-size', type=int, default=256, help='per-connection event buffer')
+    parser.add_argument('--compact', action='store_true', help='send events as [kind, ...fields] arrays')
+    args = parser.parse_args()
+
+    server = OrchestratorServer(args.model, args.queue_size, args.compact)
+    if args.unix:
+        asyncio.run(server.serve_unix(args.unix))
+    else:
+        asyncio.run(server.serve_tcp(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,5 +3,6 @@ Custom UI widgets for the Claude CLI Mimic application.
 """
 from .input_area import InputArea
 from .chat_log import ChatLog
+from .streaming_message import StreamingMessage
 
-__all__ = ["InputArea", "ChatLog"]
+__all__ = ["InputArea", "ChatLog", "StreamingMessage"]
@@ -1,8 +1,57 @@
 """
 Chat display widgets for the Claude CLI Mimic application.
 """
+from collections import deque
+from typing import Any
+
+from rich.text import Text
+from textual import events
 from textual.widgets import RichLog
 
 
 class ChatLog(RichLog):
-    pass
+    """
+    RichLog는 write 시점의 폭으로 줄을 잘라 저장하므로, 폭이 바뀌면 예전 줄은 그대로 남는다.
+    append()로 쓴 renderable은 원본을 들고 있다가 resize 때 새 폭으로 다시 쓴다.
+    cache 된 renderable(parse/highlight 끝난 것)을 다시 배치만 하므로 비용이 크지 않다.
+    긴 session에서 원본과 reflow 비용이 끝없이 늘지 않도록 최근 max_entries개만 들고 있는다.
+    그보다 오래된 entry는 resize 후에는 log에서 빠지고, 그 자리에 빠진 개수를 알려주는 줄을 쓴다.
+    """
+
+    DEFAULT_MAX_ENTRIES = 500
+
+    def __init__(self, *args, max_entries: int | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._entries: deque[Any] = deque(maxlen=max_entries or self.DEFAULT_MAX_ENTRIES)
+        self.dropped_entries = 0
+        self._flow_width: int | None = None
+        self._reflow_pending = False
+
+    def append(self, content: Any) -> None:
+        if len(self._entries) == self._entries.maxlen:
+            self.dropped_entries += 1
+        self._entries.append(content)
+        self.write(content)
+
+    def on_resize(self, event: events.Resize) -> None:
+        width = event.size.width
+        if not width or width == self._flow_width:
+            return
+        reflow = self._flow_width is not None
+        self._flow_width = width
+        if reflow and not self._reflow_pending:
+            self._reflow_pending = True
+            self.call_after_refresh(self._reflow)
+
+    def _reflow(self) -> None:
+        self._reflow_pending = False
+        self.clear()
+        if self.dropped_entries:
+            self.write(
+                Text(f'[{self.dropped_entries} earlier messages not shown, '
+                     f'only the last {self._entries.maxlen} are kept]', style='dim'),
+                scroll_end=False,
+            )
+        for content in self._entries:
+            self.write(content, scroll_end=False)
+        self.scroll_end(animate=False)
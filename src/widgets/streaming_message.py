@@ -0,0 +1,247 @@
+"""
+Streaming assistant message widget for the Claude CLI Mimic application.
+
+토큰이 들어올 때마다 전체 메시지를 다시 parse하지 않도록 markdown을 block 단위로 나눈다.
+완성된 block은 한 번만 parse/highlight 해서 renderable을 cache 해두고,
+아직 끝나지 않은 마지막 block만 매 frame 다시 만든다.
+block 경계는 markdown-it(rich Markdown과 같은 parser)의 top-level token으로 정하므로
+loose list, 여러 문단짜리 list item, indented code도 전체를 한 번에 parse 한 결과와 같게 나뉜다.
+"""
+
+import re
+from typing import Optional
+
+from markdown_it import MarkdownIt
+from rich.console import Group, RenderableType
+from rich.markdown import Markdown
+from rich.padding import Padding
+from rich.syntax import Syntax
+from rich.text import Text
+from textual.containers import VerticalScroll
+from textual.widgets import Static
+
+
+_FENCE_RE = re.compile(r'(`{3,}|~{3,})\s*([\w+-]*)')
+
+# rich.markdown.Markdown이 쓰는 설정과 같게 맞춘다.
+_BLOCK_PARSER = MarkdownIt().enable('strikethrough').enable('table')
+
+CODE_THEME = 'monokai'
+
+
+def render_code(code: str, lang: str) -> RenderableType:
+    """
+    highlight 결과를 Text로 들고 있으면 resize 때는 줄바꿈만 다시 하고 lexer는 다시 돌지 않는다.
+    """
+    syntax = Syntax(code, lang or 'text', theme=CODE_THEME)
+    text = syntax.highlight(code)
+    text.rstrip()
+    return Padding(text, (0, 0, 0, 2))
+
+
+def render_prose(src: str) -> Markdown:
+    # Markdown은 생성 시점에 parse 하고, 렌더링 시점에는 폭에 맞춰 배치만 한다.
+    return Markdown(src, code_theme=CODE_THEME)
+
+
+# rich Markdown은 element마다 다음 block 앞에 빈 줄을 넣을지(new_line)가 다르고,
+# list/blockquote/table 같은 container는 안쪽 element 때문에 항상 앞에 빈 줄이 붙는다.
+# 나눠서 만든 block 사이 간격을 전체를 한 번에 렌더링했을 때와 같게 맞추려고 아래 두 가지를 본다.
+
+def _ends_with_new_line(md: Markdown) -> bool:
+    for tok in reversed(md.parsed):
+        if tok.level == 0 and tok.nesting != -1:
+            element = md.elements.get(tok.type)
+            return element.new_line if element is not None else True
+    return True
+
+
+def _starts_with_new_line(renderable: RenderableType) -> bool:
+    if not isinstance(renderable, Markdown) or len(renderable.parsed) < 2:
+        return False
+    first, second = renderable.parsed[0], renderable.parsed[1]
+    return first.nesting == 1 and second.type != 'inline'
+
+
+class MarkdownStream:
+    """
+    streamed markdown을 block 단위로 잘라 완성된 block의 renderable을 cache 한다.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.text = ''
+        self.blocks: list[RenderableType] = []
+        self._new_line = True
+        self._scan_pos = 0
+        self._block_start = 0
+        self._fence: Optional[str] = None
+        self._fence_lang = ''
+        self._fence_body_start = 0
+        self._after_blank = False
+        self._tail_src: Optional[str] = None
+        self._tail: Optional[RenderableType] = None
+
+    def feed(self, chunk: str) -> None:
+        self.text += chunk
+        self._scan()
+
+    def _needs_gap(self, renderable: RenderableType) -> bool:
+        return bool(self.blocks) and self._new_line and not _starts_with_new_line(renderable)
+
+    def _add_block(self, renderable: RenderableType, new_line: bool = True) -> None:
+        if self._needs_gap(renderable):
+            self.blocks.append(Text(''))
+        self.blocks.append(renderable)
+        self._new_line = new_line
+
+    def _commit_prose(self, end: int) -> None:
+        src = self.text[self._block_start:end]
+        if src.strip():
+            md = render_prose(src)
+            self._add_block(md, _ends_with_new_line(md))
+
+    def _commit_completed(self, end: int) -> None:
+        """
+        아직 확정하지 않은 prose(_block_start ~ end)를 parse 해서 마지막 top-level block 앞까지 확정한다.
+        마지막 block은 이어지는 줄에 따라 모양이 바뀔 수 있으므로 남겨둔다.
+        """
+        src = self.text[self._block_start:end]
+        starts = [tok.map[0] for tok in _BLOCK_PARSER.parse(src)
+                  if tok.level == 0 and tok.map is not None and tok.nesting != -1]
+        if len(starts) < 2 or not starts[-1]:
+            return
+        offset = self._block_start
+        for _ in range(starts[-1]):
+            offset = self.text.index('\n', offset) + 1
+        self._commit_prose(offset)
+        self._block_start = offset
+
+    def _scan(self) -> None:
+        """
+        새로 완성된 줄만 훑는다. 이미 본 줄은 다시 보지 않는다.
+        빈 줄 다음에 내용이 오면 새 top-level block이 시작됐을 수 있으므로 그때만 parse 해본다.
+        """
+        text = self.text
+        pos = self._scan_pos
+        while True:
+            nl = text.find('\n', pos)
+            if nl == -1:
+                break
+            line_start, pos = pos, nl + 1
+            line = text[line_start:nl]
+            stripped = line.strip()
+
+            if self._fence:
+                if stripped.startswith(self._fence) and not stripped.strip(self._fence[0]):
+                    code = text[self._fence_body_start:line_start]
+                    self._add_block(render_code(code, self._fence_lang))
+                    self._fence = None
+                    self._block_start = pos
+                continue
+
+            # 들여쓴 fence는 list item 안의 code일 수 있으므로 markdown 쪽에 맡긴다.
+            m = _FENCE_RE.match(line)
+            if m:
+                self._commit_prose(line_start)
+                self._fence, self._fence_lang = m.group(1), m.group(2)
+                self._fence_body_start = pos
+                self._block_start = line_start
+            elif stripped and self._after_blank:
+                self._commit_completed(pos)
+            self._after_blank = not stripped
+        self._scan_pos = pos
+
+    def tail(self) -> Optional[RenderableType]:
+        """끝나지 않은 마지막 block. 바뀌지 않았으면 이전 renderable을 그대로 쓴다."""
+        src = self.text[self._block_start:]
+        if src == self._tail_src:
+            return self._tail
+        self._tail_src = src
+        if not src.strip():
+            self._tail = None
+        elif self._fence:
+            # 열린 code block은 닫힐 때 한 번만 highlight 한다.
+            body = self.text[self._fence_body_start:]
+            self._tail = Padding(Text(body, style='dim'), (0, 0, 0, 2))
+        else:
+            self._tail = render_prose(src)
+        return self._tail
+
+    def renderable(self) -> RenderableType:
+        tail = self.tail()
+        if tail is None:
+            return Group(*self.blocks)
+        if self._needs_gap(tail):
+            return Group(*self.blocks, Text(''), tail)
+        return Group(*self.blocks, tail)
+
+    def finish(self) -> RenderableType:
+        """스트림이 끝나면 남은 block까지 확정해서 cache 된 renderable만으로 이뤄진 Group을 돌려준다."""
+        if not self.text.endswith('\n'):
+            self.feed('\n')
+        if self._fence:
+            code = self.text[self._fence_body_start:]
+            self._add_block(render_code(code, self._fence_lang))
+            self._fence = None
+        else:
+            self._commit_prose(len(self.text))
+        self._block_start = self._scan_pos = len(self.text)
+        self._tail_src = self._tail = None
+        return Group(*self.blocks)
+
+
+class StreamingMessage(VerticalScroll):
+    """
+    진행 중인 assistant 답변을 보여주는 영역. 갱신은 frame 단위로 묶는다.
+    답변이 영역보다 길어지면 스크롤해서 가장 최근 내용을 보여준다.
+    """
+
+    DEFAULT_CSS = """
+    StreamingMessage {
+        height: auto;
+        max-height: 60%;
+        padding: 0 1;
+    }
+    StreamingMessage > Static {
+        height: auto;
+    }
+    """
+
+    REFRESH_INTERVAL = 1 / 30
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stream = MarkdownStream()
+        self.body = Static('')
+        self._dirty = False
+
+    def compose(self):
+        yield self.body
+
+    def on_mount(self) -> None:
+        self.display = False
+        self.set_interval(self.REFRESH_INTERVAL, self._flush)
+
+    def append(self, text: str) -> None:
+        self.stream.feed(text)
+        self._dirty = True
+
+    def _flush(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        self.display = True
+        self.body.update(self.stream.renderable())
+        self.call_after_refresh(self.scroll_end, animate=False)
+
+    def finish(self) -> RenderableType:
+        """남은 내용을 확정해서 돌려주고 영역을 비운다."""
+        renderable = self.stream.finish()
+        self.stream.reset()
+        self._dirty = False
+        self.body.update('')
+        self.display = False
+        return renderable